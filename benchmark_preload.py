@@ -0,0 +1,68 @@
+import os
+import argparse
+
+from dotenv import load_dotenv
+from google import genai
+from main import build_initial_messages, run_agent
+
+# Read-only prompts, so runs do not change the working directory between them
+BENCHMARK_PROMPTS = [
+    "What files are in the project and what do they do?",
+    "How does the calculator handle operator precedence?",
+    "Run the calculator tests and summarize the results.",
+    "What does the render module output for an expression?",
+    "Use the calculator to evaluate 3 + 7 * 2.",
+]
+
+
+def main():
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY environment variable not set")
+
+    parser = argparse.ArgumentParser(
+        description="Compare iterations and tokens used with and without the workspace manifest preload"
+    )
+    parser.add_argument(
+        "-r", "--runs", type=int, default=1, help="Runs per prompt and mode"
+    )
+    args = parser.parse_args()
+    # run_agent reads these flags, keep its output quiet
+    args.verbose = False
+    args.debug = False
+
+    client = genai.Client(api_key=api_key)
+    totals = {False: [0, 0, 0], True: [0, 0, 0]}
+
+    print(f"{'prompt':<55} {'preload':<8} {'iterations':>10} {'prompt tok':>10} {'resp tok':>10}")
+    for prompt in BENCHMARK_PROMPTS:
+        for preload in (False, True):
+            for _ in range(args.runs):
+                usage_log = []
+                messages = build_initial_messages(prompt, preload)
+                _, iterations, _ = run_agent(client, messages, args, usage_log)
+                prompt_tokens = sum(u.prompt_token_count or 0 for u in usage_log if u)
+                response_tokens = sum(u.candidates_token_count or 0 for u in usage_log if u)
+                totals[preload][0] += iterations
+                totals[preload][1] += prompt_tokens
+                totals[preload][2] += response_tokens
+                print(
+                    f"{prompt[:55]:<55} {str(preload):<8} {iterations:>10} {prompt_tokens:>10} {response_tokens:>10}"
+                )
+
+    runs = len(BENCHMARK_PROMPTS) * args.runs
+    print()
+    for preload in (False, True):
+        iterations, prompt_tokens, response_tokens = totals[preload]
+        print(
+            f"preload={preload}: {iterations / runs:.2f} iterations, "
+            f"{prompt_tokens / runs:.0f} prompt tokens, {response_tokens / runs:.0f} response tokens per run"
+        )
+    saved_iterations = (totals[False][0] - totals[True][0]) / runs
+    saved_tokens = (sum(totals[False][1:]) - sum(totals[True][1:])) / runs
+    print(f"Saved per run: {saved_iterations:.2f} iterations, {saved_tokens:.0f} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from google.genai import types
+from config import WORKING_DIR
 from functions.get_files_info import get_files_info, schema_get_files_info
 from functions.write_file import write_file, schema_write_file
 from functions.get_file_content import get_file_content, schema_get_file_content
@@ -43,7 +44,7 @@ def call_function(function_call, verbose=False):
         )
 
     args = dict(function_call.args) if function_call.args else {}
-    args["working_dir"] = "./calculator"
+    args["working_dir"] = WORKING_DIR
     function_result = function_to_call(**args)
 
     return types.Content(
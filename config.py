@@ -1,3 +1,19 @@
 READ_FILE_CHAR_LIMIT    = 10_000
 MAX_ITERATIONS          = 20
 MAX_CONSECUTIVE_REPEATS = 3
+
+# Limits applied to scripts executed through run_python_file
+MAX_CONCURRENT_EXECUTIONS        = 2
+EXECUTION_TIMEOUT_SECONDS        = 30
+EXECUTION_MAX_QUEUE_WAIT_SECONDS = 120
+EXECUTION_CPU_LIMIT_SECONDS      = 20
+EXECUTION_MEMORY_LIMIT_BYTES     = 512 * 1024 * 1024
+EXECUTION_FILE_SIZE_LIMIT_BYTES  = 10 * 1024 * 1024
+EXECUTION_NICE_INCREMENT         = 10
+
+# Directory the agent's functions operate on
+WORKING_DIR = "./calculator"
+
+# Workspace manifest preloaded into the initial prompt
+MANIFEST_CHAR_LIMIT = 5_000
+MANIFEST_CACHE_FILE = ".workspace_manifest_cache.json"
@@ -1,8 +1,9 @@
 import os
-import subprocess
 import sys
 
 from google.genai import types
+from config import EXECUTION_TIMEOUT_SECONDS
+from scheduler import execution_scheduler
 
 
 def run_python_file(working_dir, file_path, args=None):
@@ -25,17 +26,20 @@ def run_python_file(working_dir, file_path, args=None):
         command.extend(args)
 
     try:
-        cp = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        result = execution_scheduler.run(command)
         output_str = ""
-        if cp.returncode != 0:
-            output_str += f"Process exited with code {cp.returncode}.\n"
-        if not cp.stdout and not cp.stderr:
+        if result.timed_out:
+            output_str += f"Process timed out after {EXECUTION_TIMEOUT_SECONDS} seconds and was killed.\n"
+        elif result.returncode != 0:
+            output_str += f"Process exited with code {result.returncode}.\n"
+        if not result.stdout and not result.stderr:
             output_str += f"No output produced.\n"
         else:
-            if cp.stdout:
-                output_str += f"STDOUT: {cp.stdout}\n"
-            if cp.stderr:
-                output_str += f"STDERR: {cp.stderr}\n"
+            if result.stdout:
+                output_str += f"STDOUT: {result.stdout}\n"
+            if result.stderr:
+                output_str += f"STDERR: {result.stderr}\n"
+        output_str += f"{result.format_stats()}\n"
     except Exception as e:
         return f"Error: executing Python file: {e}"
 
@@ -51,7 +55,9 @@ schema_run_python_file = types.FunctionDeclaration(
     description=(
         "Execute a Python (.py) file and return its output. "
         "The file_path must resolve inside the current working directory and must point to an existing regular .py file. "
-        "Optional args are passed as command-line arguments to the script."
+        "Optional args are passed as command-line arguments to the script. "
+        "Executions are queued and run with CPU, memory and file size limits; "
+        "the result reports queue wait, CPU time and peak memory usage."
     ),
     parameters=types.Schema(
         type=types.Type.OBJECT,
@@ -7,7 +7,8 @@ from google import genai
 from google.genai import types
 from prompts import system_prompt
 from call_function import available_functions, call_function
-from config import MAX_ITERATIONS, MAX_CONSECUTIVE_REPEATS
+from config import MAX_ITERATIONS, MAX_CONSECUTIVE_REPEATS, WORKING_DIR
+from workspace_manifest import build_manifest
 
 
 def main():
@@ -27,15 +28,54 @@ def main():
         action="store_true",
         help="Enable debug mode (print function responses)",
     )
+    parser.add_argument(
+        "-p",
+        "--preload",
+        action="store_true",
+        help="Preload a manifest of the working directory into the initial prompt",
+    )
     args = parser.parse_args()
 
     client = genai.Client(api_key=api_key)
-    messages = [types.Content(role="user", parts=[types.Part(text=args.user_prompt)])]
+    messages = build_initial_messages(args.user_prompt, args.preload)
+    response, _, loop_detected = run_agent(client, messages, args)
+    if loop_detected:
+        # run_agent already reported the loop
+        return
+
+    if response and response.text:
+        print("Final response:")
+        print(response.text)
+    else:
+        print("Could not get a response")
+
+
+def build_initial_messages(user_prompt, preload=False):
+    """
+    Build the initial conversation messages.
+    If preload is set, a manifest of the working directory is included before the user prompt,
+    so the model does not need to spend iterations discovering the layout of the working directory.
+    """
+    parts = []
+    if preload:
+        parts.append(types.Part(text=build_manifest(WORKING_DIR)))
+    parts.append(types.Part(text=user_prompt))
+    return [types.Content(role="user", parts=parts)]
+
+
+def run_agent(client, messages, args, usage_log=None):
+    """
+    Run the agent loop until the model gives a final response, the iteration limit is reached, or a loop is detected.
+    Returns the final model response (or None), the number of iterations used, and whether a loop was detected.
+    If usage_log is given, the usage metadata of every model response is appended to it.
+    """
     response = None
     function_call_history = []
 
     for i in range(MAX_ITERATIONS):
-        response, messages, function_calls = generate_content(client, messages, args, i)
+        response, messages, function_calls = generate_content(
+            client, messages, args, i, usage_log
+        )
 
         if args.debug:
             print_function_calls(function_calls)
@@ -62,19 +102,15 @@ def main():
                     print(
                         f"Stopping after {i + 1} iterations to prevent unnecessary API calls."
                     )
-                    return
+                    return None, i + 1, True
 
         if response:
-            break
+            return response, i + 1, False
 
-    if response and response.text:
-        print("Final response:")
-        print(response.text)
-    else:
-        print("Could not get a response")
+    return None, MAX_ITERATIONS, False
 
 
-def generate_content(client, messages, args, iteration):
+def generate_content(client, messages, args, iteration, usage_log=None):
     """
     Generate content from the model based on the current conversation messages, and handle function calls if present.
     Returns the model response, updated messages, and any function calls made by the model.
@@ -91,6 +127,8 @@ def generate_content(client, messages, args, iteration):
 
     if args.verbose:
         print_response_metadata(response, iteration)
+    if usage_log is not None:
+        usage_log.append(response.usage_metadata)
 
     if response.candidates:
         for c in response.candidates:
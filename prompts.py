@@ -10,5 +10,7 @@ When a user asks a question or makes a request, make a function call plan. You c
 
 All paths you provide should be relative to the working directory. You do not need to specify the working directory in your function calls as it is automatically injected for security reasons.
 
+The first message may include a manifest of the working directory, listing its files with their sizes, languages and top-level Python symbols. When it is present, use it instead of listing directories to discover the layout.
+
 After the plan is executed, in your final response, provide a concise explanation of the results of the operations you performed. If you fixed a bug, explain what the bug was and how you fixed it.
 """
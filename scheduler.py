@@ -0,0 +1,430 @@
+import json
+import os
+import signal
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import fcntl
+    import resource
+except ImportError:
+    # Not available on Windows: run without the shared queue or rlimits
+    fcntl = None
+    resource = None
+
+from config import (
+    MAX_CONCURRENT_EXECUTIONS,
+    EXECUTION_TIMEOUT_SECONDS,
+    EXECUTION_MAX_QUEUE_WAIT_SECONDS,
+    EXECUTION_CPU_LIMIT_SECONDS,
+    EXECUTION_MEMORY_LIMIT_BYTES,
+    EXECUTION_FILE_SIZE_LIMIT_BYTES,
+    EXECUTION_NICE_INCREMENT,
+)
+
+
+def _default_queue_dir():
+    # Each user gets a private queue, as a state file writable by other users could be
+    # pointed at any file the agent can write, or filled with tickets that never expire
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "ai-agent-execution-queue")
+    return os.path.join(tempfile.gettempdir(), f"ai-agent-execution-queue-{os.getuid()}")
+
+
+EXECUTION_QUEUE_DIR = _default_queue_dir() if hasattr(os, "getuid") else None
+QUEUE_POLL_SECONDS = 0.05
+# A waiting ticket is dropped if its agent stops polling for this long
+QUEUE_TICKET_STALE_SECONDS = 10
+# A running ticket is dropped this long after its run should have been killed by the timeout
+RUNNING_TICKET_GRACE_SECONDS = 30
+READ_CHUNK_BYTES = 64 * 1024
+READER_JOIN_TIMEOUT_SECONDS = 1
+KILL_GRACE_SECONDS = 1
+
+
+@dataclass
+class ExecutionResult:
+    returncode: int | None
+    stdout: str
+    stderr: str
+    queue_wait: float
+    cpu_time: float | None = None
+    peak_rss_bytes: int | None = None
+    timed_out: bool = False
+
+    def format_stats(self):
+        stats = [f"queue_wait={self.queue_wait:.2f}s"]
+        if self.cpu_time is not None:
+            stats.append(f"cpu_time={self.cpu_time:.2f}s")
+        if self.peak_rss_bytes is not None:
+            stats.append(f"peak_rss={self.peak_rss_bytes / (1024 * 1024):.1f} MB")
+        return "Execution stats: " + ", ".join(stats)
+
+
+class ExecutionScheduler:
+    """
+    Limit how many scripts run at once for the current user on this host.
+    Runs wait in a single first-in first-out queue, kept in a state file in queue_dir that all of the user's agent processes share.
+    An agent runs one tool call at a time, so each session has at most one run waiting,
+    and serving the queue in order shares the slots fairly between sessions.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_EXECUTIONS, queue_dir=EXECUTION_QUEUE_DIR):
+        self.max_concurrent = max_concurrent
+        self.queue_dir = queue_dir
+        self.state_file = os.path.join(queue_dir, "queue.json") if queue_dir else None
+        # Without fcntl the queue cannot be shared, so the limit only holds within this process
+        self._local_slots = threading.BoundedSemaphore(max_concurrent)
+
+    @contextmanager
+    def slot(self, run_timeout=EXECUTION_TIMEOUT_SECONDS):
+        """
+        Block until a slot is granted. Yields the time spent waiting, in seconds.
+        Raises TimeoutError if no slot is granted within EXECUTION_MAX_QUEUE_WAIT_SECONDS.
+        """
+        start = time.monotonic()
+        if fcntl is None:
+            if not self._local_slots.acquire(timeout=EXECUTION_MAX_QUEUE_WAIT_SECONDS):
+                raise _queue_timeout()
+            try:
+                yield time.monotonic() - start
+            finally:
+                self._local_slots.release()
+            return
+
+        ticket_id = uuid.uuid4().hex
+        try:
+            while not self._try_start(ticket_id, run_timeout):
+                if time.monotonic() - start > EXECUTION_MAX_QUEUE_WAIT_SECONDS:
+                    raise _queue_timeout()
+                time.sleep(QUEUE_POLL_SECONDS)
+        except BaseException:
+            with self._state() as state:
+                _discard(state["queue"], ticket_id)
+            raise
+
+        try:
+            yield time.monotonic() - start
+        finally:
+            with self._state() as state:
+                _discard(state["running"], ticket_id)
+
+    def _try_start(self, ticket_id, run_timeout):
+        # Tickets carry an expiry, so a ticket left behind by an agent that was killed
+        # is dropped even if its pid has been reused by another process
+        now = time.time()
+        with self._state() as state:
+            queue = state["queue"]
+            ticket = next((t for t in queue if t["id"] == ticket_id), None)
+            if ticket is None:
+                # First poll, or the ticket was dropped while this agent was stalled
+                ticket = {"id": ticket_id, "pid": os.getpid()}
+                queue.append(ticket)
+            ticket["expires"] = now + QUEUE_TICKET_STALE_SECONDS
+            if queue[0] is not ticket or len(state["running"]) >= self.max_concurrent:
+                return False
+            queue.pop(0)
+            state["running"].append({
+                "id": ticket_id,
+                "pid": os.getpid(),
+                "expires": now + run_timeout + RUNNING_TICKET_GRACE_SECONDS,
+            })
+            return True
+
+    @contextmanager
+    def _state(self):
+        """Lock the shared state file and yield its contents, which are written back on exit."""
+        fd = self._open_state_file()
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            if not isinstance(state, dict):
+                # Corrupt state file, start over
+                state = {}
+            state = {key: _live_tickets(state.get(key)) for key in ("queue", "running")}
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+
+    def _open_state_file(self):
+        # The queue directory may sit in a shared location such as /tmp, where another user
+        # could have created it first, so it is only used if it is a real directory owned by us
+        # and closed to everyone else. The state file is never opened through a symlink
+        try:
+            os.mkdir(self.queue_dir, 0o700)
+        except FileExistsError:
+            pass
+        st = os.lstat(self.queue_dir)
+        if (
+            not stat.S_ISDIR(st.st_mode)
+            or st.st_uid != os.getuid()
+            or st.st_mode & 0o077
+        ):
+            raise PermissionError(
+                f'Execution queue directory "{self.queue_dir}" must be a directory owned by the current user '
+                "and not accessible to other users"
+            )
+
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode) or st.st_uid != os.getuid():
+            os.close(fd)
+            raise PermissionError(
+                f'Execution queue state file "{self.state_file}" must be a regular file owned by the current user'
+            )
+        return fd
+
+    def run(self, command, timeout=EXECUTION_TIMEOUT_SECONDS):
+        """
+        Run a command once a slot is available, with resource limits applied to the child process.
+        A command that runs longer than timeout seconds is killed, and its result has timed_out set
+        along with the output it produced until then.
+        Raises TimeoutError if the command waits longer than EXECUTION_MAX_QUEUE_WAIT_SECONDS for a slot.
+        """
+        with self.slot(timeout) as queue_wait:
+            if resource is None:
+                return _run_unlimited(command, timeout, queue_wait)
+            return _run_limited(command, timeout, queue_wait)
+
+
+def _discard(tickets, ticket_id):
+    tickets[:] = [t for t in tickets if t["id"] != ticket_id]
+
+
+def _queue_timeout():
+    return TimeoutError(
+        f"No execution slot became free within {EXECUTION_MAX_QUEUE_WAIT_SECONDS} seconds"
+    )
+
+
+def _live_tickets(tickets):
+    """Drop malformed and expired tickets, and tickets of agents that exited without releasing them."""
+    if not isinstance(tickets, list):
+        return []
+    now = time.time()
+    return [
+        t for t in tickets
+        if _is_valid_ticket(t) and t["expires"] > now and _is_alive(t["pid"])
+    ]
+
+
+def _is_valid_ticket(ticket):
+    return (
+        isinstance(ticket, dict)
+        and isinstance(ticket.get("id"), str)
+        and type(ticket.get("pid")) is int
+        and ticket["pid"] > 0
+        and isinstance(ticket.get("expires"), (int, float))
+    )
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user
+        return True
+    return True
+
+
+# Applies the resource limits, then runs the command in a child process and exits with its status.
+# The command is started from this small interpreter rather than exec'd in place, because on Linux
+# the peak RSS of an exec'd process includes the memory of the agent it was spawned from.
+# The command's own peak RSS is written to the report file descriptor instead.
+# This runs as its own interpreter instead of as a preexec_fn, because preexec_fn
+# can deadlock the child when other threads are running, and the scheduler always has some.
+# Limits the platform does not support are skipped.
+# Soft and hard limits are both set, so the script cannot raise them back.
+# The CPU hard limit is one second above the soft one, so SIGXCPU arrives before SIGKILL.
+LIMIT_WRAPPER = """
+import os, resource, signal, sys
+cpu, memory, file_size, nice, report_fd = map(int, sys.argv[1:6])
+command = sys.argv[6:]
+limits = [
+    (resource.RLIMIT_CPU, cpu, 1),
+    (resource.RLIMIT_AS, memory, 0),
+    (resource.RLIMIT_FSIZE, file_size, 0),
+]
+for limit, value, grace in limits:
+    try:
+        _, hard = resource.getrlimit(limit)
+        new_hard = value + grace
+        if hard != resource.RLIM_INFINITY:
+            new_hard = min(new_hard, hard)
+            value = min(value, new_hard)
+        resource.setrlimit(limit, (value, new_hard))
+    except (ValueError, OSError):
+        pass
+try:
+    os.nice(nice)
+except OSError:
+    pass
+os.set_inheritable(report_fd, False)
+pid = 0
+# SIGTERM asks the wrapper to kill the command, so it can still reap it and report its usage
+signal.signal(signal.SIGTERM, lambda *_: pid and os.kill(pid, signal.SIGKILL))
+pid = os.fork()
+if pid == 0:
+    try:
+        os.execv(command[0], command)
+    except OSError as e:
+        print(f"Error: could not execute {command[0]}: {e}", file=sys.stderr)
+    os._exit(127)
+_, status, usage = os.wait4(pid, 0)
+os.write(report_fd, str(usage.ru_maxrss).encode())
+os.close(report_fd)
+if os.WIFSIGNALED(status):
+    # Die from the same signal, so the scheduler sees how the command ended
+    sig = os.WTERMSIG(status)
+    if sig != signal.SIGKILL:
+        signal.signal(sig, signal.SIG_DFL)
+    os.kill(os.getpid(), sig)
+os._exit(os.waitstatus_to_exitcode(status) & 0xFF)
+"""
+
+
+def _limited_command(command, report_fd):
+    return [
+        sys.executable,
+        "-c",
+        LIMIT_WRAPPER,
+        str(EXECUTION_CPU_LIMIT_SECONDS),
+        str(EXECUTION_MEMORY_LIMIT_BYTES),
+        str(EXECUTION_FILE_SIZE_LIMIT_BYTES),
+        str(EXECUTION_NICE_INCREMENT),
+        str(report_fd),
+        *command,
+    ]
+
+
+def _run_limited(command, timeout, queue_wait):
+    # The child gets its own process group, so anything it starts can be killed with it
+    report_read, report_write = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            _limited_command(command, report_write),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            process_group=0,
+            pass_fds=(report_write,),
+        )
+    except BaseException:
+        os.close(report_read)
+        raise
+    finally:
+        os.close(report_write)
+
+    # Drain the pipes in the background, so the child cannot block on a full pipe
+    # while we wait on it with os.wait4 to collect its resource usage.
+    # Output is read in chunks, so whatever was read is kept if a reader has to be abandoned
+    output = {"stdout": [], "stderr": []}
+
+    def drain(name, stream):
+        # The reader closes its own stream: closing it from here while a read
+        # is in progress would block on the stream's lock
+        with stream:
+            while chunk := stream.read1(READ_CHUNK_BYTES):
+                output[name].append(chunk)
+
+    readers = [
+        threading.Thread(target=drain, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=drain, args=("stderr", proc.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    lock = threading.Lock()
+    finished = False
+    timed_out = False
+
+    def kill(force):
+        nonlocal timed_out
+        with lock:
+            if finished:
+                return
+            timed_out = True
+            if force:
+                _kill_group(proc.pid)
+            else:
+                os.kill(proc.pid, signal.SIGTERM)
+
+    # On timeout the wrapper is asked to kill the script, so the script's usage is still reported.
+    # If the wrapper does not exit shortly after, the whole group is killed
+    timers = [
+        threading.Timer(timeout, kill, (False,)),
+        threading.Timer(timeout + KILL_GRACE_SECONDS, kill, (True,)),
+    ]
+    for timer in timers:
+        timer.start()
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        with lock:
+            finished = True
+        for timer in timers:
+            timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # Stop anything the script left running in the background, it would otherwise
+    # keep the pipes open and the readers waiting
+    _kill_group(proc.pid)
+    for reader in readers:
+        reader.join(READER_JOIN_TIMEOUT_SECONDS)
+    with os.fdopen(report_read, "rb") as report:
+        # Empty if the wrapper was killed before it could report
+        max_rss = int(report.read() or 0) or None
+    stdout = b"".join(output["stdout"]).decode(errors="replace")
+    stderr = b"".join(output["stderr"]).decode(errors="replace")
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    if max_rss is not None and sys.platform != "darwin":
+        max_rss *= 1024
+    return ExecutionResult(
+        returncode=proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        queue_wait=queue_wait,
+        cpu_time=usage.ru_utime + usage.ru_stime,
+        peak_rss_bytes=max_rss,
+        # The timer can fire just after the child exited on its own,
+        # so only report a timeout if the child was actually killed
+        timed_out=timed_out and proc.returncode == -signal.SIGKILL,
+    )
+
+
+def _run_unlimited(command, timeout, queue_wait):
+    try:
+        cp = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        # The partial output of a timed out run is bytes, even in text mode
+        stdout, stderr = (
+            out.decode(errors="replace") if isinstance(out, bytes) else out or ""
+            for out in (e.stdout, e.stderr)
+        )
+        return ExecutionResult(None, stdout, stderr, queue_wait, timed_out=True)
+    return ExecutionResult(cp.returncode, cp.stdout, cp.stderr, queue_wait)
+
+
+def _kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+execution_scheduler = ExecutionScheduler()
@@ -0,0 +1,51 @@
+import sys
+import tempfile
+import threading
+import time
+
+from scheduler import ExecutionScheduler
+
+
+def main():
+    scheduler = ExecutionScheduler(max_concurrent=1, queue_dir=tempfile.mkdtemp())
+
+    # Should print the script output followed by the execution stats
+    result = scheduler.run([sys.executable, "calculator/main.py", "3 + 5"])
+    print(result.stdout)
+    print(result.format_stats())
+
+    # Should be killed by the timeout, keeping the output produced until then
+    result = scheduler.run(
+        [sys.executable, "-c", "print('started', flush=True)\nwhile True: pass"], timeout=2
+    )
+    print(f"timed_out={result.timed_out}, stdout={result.stdout!r}")
+    print(result.format_stats())
+
+    # Should run in the order the runs were queued, with growing queue waits.
+    # The first run holds the only slot so that the others queue up behind it
+    order = []
+    threads = []
+    blocker = threading.Thread(
+        target=scheduler.run,
+        args=([sys.executable, "-c", "import time; time.sleep(0.5)"],),
+    )
+    blocker.start()
+    time.sleep(0.1)
+    for label in ["a", "b", "c", "d"]:
+        thread = threading.Thread(
+            target=lambda l=label: order.append(
+                (l, scheduler.run([sys.executable, "-c", "import time; time.sleep(0.2)"]))
+            )
+        )
+        threads.append(thread)
+        thread.start()
+        time.sleep(0.01)
+    blocker.join()
+    for thread in threads:
+        thread.join()
+    for label, result in order:
+        print(label, result.format_stats())
+
+if __name__ == "__main__":
+    print("Running tests for the execution scheduler")
+    main()
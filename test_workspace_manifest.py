@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+from workspace_manifest import build_manifest
+
+
+def main():
+    cache_file = os.path.join(tempfile.mkdtemp(), "manifest_cache.json")
+
+    # Should print the tree with sizes, languages and Python symbols
+    print(build_manifest("calculator", cache_file))
+    # Should print the same manifest, built from the cache
+    print(build_manifest("calculator", cache_file))
+    # Should print only the header, as the directory does not exist
+    print(build_manifest("calculator/nonexistent", cache_file))
+
+
+if __name__ == "__main__":
+    print("Running tests for the workspace manifest")
+    main()
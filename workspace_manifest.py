@@ -0,0 +1,197 @@
+import ast
+import json
+import os
+
+from config import MANIFEST_CHAR_LIMIT, MANIFEST_CACHE_FILE
+
+LANGUAGES = {
+    ".py": "python",
+    ".md": "markdown",
+    ".txt": "text",
+    ".json": "json",
+    ".toml": "toml",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".cfg": "ini",
+    ".ini": "ini",
+    ".sh": "shell",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".html": "html",
+    ".css": "css",
+}
+SKIPPED_DIRS = {"__pycache__", ".git", ".venv", "venv", "node_modules"}
+# Bump when the cached entries change shape or meaning, to discard older caches
+CACHE_VERSION = 2
+
+
+def build_manifest(working_dir, cache_file=MANIFEST_CACHE_FILE):
+    """
+    Build a compact text manifest of the working directory: its tree, file sizes, languages,
+    and the top-level symbols of each Python file.
+    Scanning stops once the manifest reaches MANIFEST_CHAR_LIMIT characters.
+    Directory listings and Python symbols are cached in cache_file, keyed by directory and file mtimes,
+    so only the parts of the tree that changed since the last run are listed or parsed again.
+    """
+    working_path = os.path.abspath(working_dir)
+    cache = _load_cache(cache_file)
+    old_dirs = cache.get(working_path, {})
+    new_dirs = {}
+
+    out = {"lines": [], "size": 0, "full": False}
+    _add_line(out, f"Workspace manifest of the working directory ({working_dir}):")
+    _scan_dir(working_path, ".", 0, old_dirs, new_dirs, out)
+
+    if out["full"]:
+        # Directories past the limit were not visited, keep what is cached for them
+        new_dirs = {**old_dirs, **new_dirs}
+    cache[working_path] = new_dirs
+    _save_cache(cache_file, cache)
+
+    manifest = "\n".join(out["lines"])
+    if out["full"]:
+        manifest += f"\n[... Manifest truncated at {MANIFEST_CHAR_LIMIT} characters]"
+    return manifest
+
+
+def _add_line(out, line):
+    """Add a line to the manifest, unless it would exceed MANIFEST_CHAR_LIMIT. Returns whether it was added."""
+    size = out["size"] + len(line) + (1 if out["lines"] else 0)
+    if size > MANIFEST_CHAR_LIMIT:
+        out["full"] = True
+        return False
+    out["lines"].append(line)
+    out["size"] = size
+    return True
+
+
+def _scan_dir(working_path, rel_dir, depth, old_dirs, new_dirs, out):
+    dir_path = os.path.normpath(os.path.join(working_path, rel_dir))
+    try:
+        dir_mtime = os.stat(dir_path).st_mtime_ns
+    except OSError:
+        return
+
+    cached = old_dirs.get(rel_dir)
+    if cached and cached["mtime"] == dir_mtime:
+        # No entries were added, removed or renamed, reuse the listing
+        entries = cached["entries"]
+    else:
+        entries = _list_dir(working_path, dir_path)
+    cached_files = cached["files"] if cached else {}
+
+    files = {}
+    indent = "  " * depth
+    for name, is_dir in entries:
+        if out["full"]:
+            # Stop scanning once the manifest is full, the rest would be thrown away
+            break
+        rel_path = os.path.join(rel_dir, name) if rel_dir != "." else name
+        if is_dir:
+            if _add_line(out, f"{indent}- {name}/"):
+                _scan_dir(working_path, rel_path, depth + 1, old_dirs, new_dirs, out)
+            continue
+
+        try:
+            st = os.stat(os.path.join(dir_path, name))
+        except OSError:
+            continue
+        info = cached_files.get(name)
+        if not info or info["mtime"] != st.st_mtime_ns or info["size"] != st.st_size:
+            info = _describe_file(os.path.join(dir_path, name), st)
+        files[name] = info
+
+        line = f"{indent}- {name} ({info['language']}, {info['size']} bytes)"
+        if info["symbols"]:
+            line += ": " + ", ".join(info["symbols"])
+        _add_line(out, line)
+
+    if out["full"]:
+        # Scanning stopped partway through this directory, keep what is cached
+        # for the files that were not visited
+        names = {name for name, _ in entries}
+        files = {
+            **{name: info for name, info in cached_files.items() if name in names},
+            **files,
+        }
+    new_dirs[rel_dir] = {"mtime": dir_mtime, "entries": entries, "files": files}
+
+
+def _list_dir(working_path, dir_path):
+    try:
+        with os.scandir(dir_path) as it:
+            dir_entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return []
+
+    entries = []
+    for entry in dir_entries:
+        if entry.name.startswith(".") or entry.name in SKIPPED_DIRS:
+            continue
+        try:
+            if entry.is_symlink():
+                # Never follow links to directories, as os.walk does, so the scan cannot loop
+                # or leave the working directory. Linked files are kept only if they resolve inside it
+                target_path = os.path.realpath(entry.path)
+                if os.path.commonpath([working_path, target_path]) != working_path:
+                    continue
+                if not os.path.isfile(target_path):
+                    continue
+            entries.append([entry.name, entry.is_dir(follow_symlinks=False)])
+        except (OSError, ValueError):
+            continue
+    return entries
+
+
+def _describe_file(file_path, st):
+    ext = os.path.splitext(file_path)[1].lower()
+    language = LANGUAGES.get(ext, ext[1:] if ext else "unknown")
+    symbols = _python_symbols(file_path) if ext == ".py" else []
+    return {
+        "mtime": st.st_mtime_ns,
+        "size": st.st_size,
+        "language": language,
+        "symbols": symbols,
+    }
+
+
+def _python_symbols(file_path):
+    try:
+        with open(file_path) as f:
+            tree = ast.parse(f.read(), filename=file_path)
+    except (SyntaxError, ValueError, OSError, UnicodeDecodeError):
+        return ["<could not parse>"]
+
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(f"def {node.name}")
+        elif isinstance(node, ast.ClassDef):
+            methods = [
+                n.name
+                for n in node.body
+                if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+            ]
+            symbols.append(f"class {node.name}({', '.join(methods)})")
+    return symbols
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        # Missing or corrupt cache, rebuild from scratch
+        return {"version": CACHE_VERSION}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION}
+    return cache
+
+
+def _save_cache(cache_file, cache):
+    try:
+        with open(cache_file, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        # Caching is an optimization only, the manifest is still valid
+        pass